@@ -2,6 +2,7 @@
 
 import collections
 from distutils import version  # pylint: disable=no-name-in-module
+from six import iteritems
 
 try:
     from bson import codec_options
@@ -26,15 +27,29 @@ if _PYMONGO_VERSION >= version.LooseVersion('3.8'):
 else:
     _DEFAULT_TYPE_REGISTRY = TypeRegistry()
 
+_HAS_TYPE_REGISTRY = 'type_registry' in _FIELDS
+
+_DEFAULT_UUID_REPRESENTATION = 3
+
 
 class CodecOptions(collections.namedtuple('CodecOptions', _FIELDS)):
 
+    # Like the namedtuple it extends, do not give each instance a __dict__.
+    __slots__ = ()
+
     def __new__(cls, document_class=dict,
                 tz_aware=False,
                 uuid_representation=None,
                 unicode_decode_error_handler='strict',
                 tzinfo=None, type_registry=None):
 
+        # Fast path: most callers use the default options.
+        if document_class is dict and tz_aware is False and \
+                uuid_representation is None and \
+                unicode_decode_error_handler == 'strict' and tzinfo is None and \
+                type_registry is None and cls is CodecOptions:
+            return _DEFAULT_INSTANCE
+
         if document_class != dict:
             raise NotImplementedError(
                 'Mongomock does not implement custom document_class yet: %r' % document_class)
@@ -43,8 +58,8 @@ class CodecOptions(collections.namedtuple('CodecOptions', _FIELDS)):
             raise TypeError('tz_aware must be True or False')
 
         if uuid_representation is None:
-            uuid_representation = 3
-        if uuid_representation != 3:
+            uuid_representation = _DEFAULT_UUID_REPRESENTATION
+        if uuid_representation != _DEFAULT_UUID_REPRESENTATION:
             raise NotImplementedError('Mongomock does not handle custom uuid_representation yet')
 
         if unicode_decode_error_handler not in ('strict', None):
@@ -57,7 +72,7 @@ class CodecOptions(collections.namedtuple('CodecOptions', _FIELDS)):
         values = (
             document_class, tz_aware, uuid_representation, unicode_decode_error_handler, tzinfo)
 
-        if 'type_registry' in _FIELDS:
+        if _HAS_TYPE_REGISTRY:
             if not type_registry:
                 type_registry = _DEFAULT_TYPE_REGISTRY
             elif not type_registry == _DEFAULT_TYPE_REGISTRY:
@@ -68,9 +83,37 @@ class CodecOptions(collections.namedtuple('CodecOptions', _FIELDS)):
         return tuple.__new__(cls, values)
 
     def with_options(self, **kwargs):
-        opts = self._asdict()
+        try:
+            key = (id(self), tuple(sorted((k, type(v), v) for k, v in iteritems(kwargs))))
+            cached = _WITH_OPTIONS_CACHE.get(key)
+        except TypeError:
+            # Some options (e.g. type_registry) are not hashable.
+            key = cached = None
+        if cached and cached[0] is self:
+            return cached[1]
+
+        opts = dict(zip(_FIELDS, self))
         opts.update(kwargs)
-        return CodecOptions(**opts)
+        result = CodecOptions(**opts)
+        if key:
+            if len(_WITH_OPTIONS_CACHE) >= _WITH_OPTIONS_CACHE_MAX_SIZE:
+                _WITH_OPTIONS_CACHE.clear()
+            _WITH_OPTIONS_CACHE[key] = (self, result)
+        return result
+
+
+_DEFAULT_ARGS = (
+    dict, False, _DEFAULT_UUID_REPRESENTATION, 'strict', None, _DEFAULT_TYPE_REGISTRY,
+)[:len(_FIELDS)]
+_DEFAULT_INSTANCE = tuple.__new__(CodecOptions, _DEFAULT_ARGS)
+
+
+# Cache of with_options results, keyed by the id of the source options and
+# the new values. The source options are kept in the cached value so that their
+# id cannot be reused. Ids are used because pymongo's TypeRegistry, and
+# therefore the options holding it, are not hashable.
+_WITH_OPTIONS_CACHE_MAX_SIZE = 256
+_WITH_OPTIONS_CACHE = {}
 
 
 def is_supported(custom_codec_options):
@@ -886,6 +886,9 @@ class Collection(object):
                     self._store[original_document_snapshot['_id']] = original_document_snapshot
                     raise
 
+                # The store did not see the in-place change: let it recheck TTL indexes.
+                self._store.mark_as_updated()
+
             if not multi:
                 break
 
@@ -1258,7 +1261,7 @@ class Collection(object):
         if self._store.is_empty:
             filter_applies(filter, {})
 
-        return (document for document in list(self._store.documents)
+        return (document for document in self._store.documents
                 if filter_applies(filter, document))
 
     def find_one(self, filter=None, *args, **kwargs):  # pylint: disable=keyword-arg-before-vararg
@@ -2,6 +2,7 @@ from collections import OrderedDict
 from datetime import datetime, timedelta, tzinfo
 from mongomock import InvalidURI
 import re
+import sys
 from six.moves.urllib_parse import unquote_plus
 from six import iteritems, raise_from, string_types
 import time
@@ -19,8 +20,6 @@ except ImportError:
 
 # Cache the RegExp pattern type.
 RE_TYPE = type(re.compile(''))
-_HOST_MATCH = re.compile(r'^([^@]+@)?([^:]+|\[[^\]]+\])(:([^:]+))?$')
-_SIMPLE_HOST_MATCH = re.compile(r'^([^:]+|\[[^\]]+\])(:([^:]+))?$')
 
 try:
     from bson.tz_util import utc
@@ -45,12 +44,19 @@ except ImportError:
     utc = _FixedOffset(0, 'UTC')
 
 
+# Since Python 3.7 dict keeps the insertion order and is faster than OrderedDict.
+if sys.version_info >= (3, 7):
+    ORDERED_DICT_TYPE = dict
+else:
+    ORDERED_DICT_TYPE = OrderedDict
+
+
 ASCENDING = 1
 DESCENDING = -1
 
 
 def utcnow():
-    """Simple wrapper for datetime.utcnow
+    """Simple wrapper for the current naive UTC datetime
 
     This provides a centralized definition of "now" in the mongomock realm,
     allowing users to transform the value of "now" to the future or the past,
@@ -63,7 +69,8 @@ def utcnow():
             # Test some things "100 hours" in the future
     ```
     """
-    return datetime.utcnow()
+    # datetime.utcnow is deprecated since Python 3.12.
+    return datetime.now(utc).replace(tzinfo=None)
 
 
 def print_deprecation_warning(old_param_name, new_param_name):
@@ -112,11 +119,16 @@ class hashdict(dict):
     http://stackoverflow.com/questions/1151658/python-hashable-dicts
     """
     def __key(self):
-        return frozenset((k,
-                          hashdict(v) if isinstance(v, dict) else
-                          tuple(v) if isinstance(v, list) else
-                          v)
-                         for k, v in iteritems(self))
+        # The dict cannot be modified once created, so the key is computed once.
+        try:
+            return self._cached_key
+        except AttributeError:
+            self._cached_key = frozenset((k,
+                                          hashdict(v) if isinstance(v, dict) else
+                                          tuple(v) if isinstance(v, list) else
+                                          v)
+                                         for k, v in iteritems(self))
+            return self._cached_key
 
     def __repr__(self):
         return '{0}({1})'.format(
@@ -124,7 +136,11 @@ class hashdict(dict):
             ', '.join('{0}={1}'.format(str(i[0]), repr(i[1])) for i in sorted(self.__key())))
 
     def __hash__(self):
-        return hash(self.__key())
+        try:
+            return self._cached_hash
+        except AttributeError:
+            self._cached_hash = hash(self.__key())
+            return self._cached_hash
 
     def __setitem__(self, key, value):
         raise TypeError('{0} does not support item assignment'
@@ -230,25 +246,19 @@ def parse_uri(uri, default_port=27017, warn=False):
         hosts = host_part.split(',')
     else:
         hosts = [host_part]
-    for host in hosts:
-        match = _HOST_MATCH.match(host)
-        if not match:
-            raise ValueError(
-                "Reserved characters such as ':' must be escaped according RFC "
-                "2396. An IPv6 address literal must be enclosed in '[' and ']' "
-                'according to RFC 2732.')
-        host = match.group(2)
-        if host.startswith('[') and host.endswith(']'):
-            host = host[1:-1]
-
-        port = match.group(4)
+    for entity in hosts:
+        host_and_port = None
+        userinfo, at_sign, host_without_userinfo = entity.partition('@')
+        if at_sign and userinfo:
+            host_and_port = _split_host_and_port(host_without_userinfo)
+        if not host_and_port:
+            host_and_port = _split_host_and_port(entity)
+        if not host_and_port:
+            raise ValueError(_INVALID_HOST_MESSAGE)
+        host, port = host_and_port
+
         if port:
-            try:
-                port = int(port)
-                if port < 0 or port > 65535:
-                    raise ValueError()
-            except ValueError as err:
-                raise_from(ValueError('Port must be an integer between 0 and 65535:', port), err)
+            port = _parse_port(port)
         else:
             port = default_port
 
@@ -274,29 +284,62 @@ def split_hosts(hosts, default_port=27017):
         if entity.endswith('.sock'):
             port = None
 
-        match = _SIMPLE_HOST_MATCH.match(entity)
-        if not match:
-            raise ValueError(
-                "Reserved characters such as ':' must be escaped according RFC "
-                "2396. An IPv6 address literal must be enclosed in '[' and ']' "
-                'according to RFC 2732.')
-        host = match.group(1)
-        if host.startswith('[') and host.endswith(']'):
-            host = host[1:-1]
-
-        if match.group(3):
-            try:
-                port = int(match.group(3))
-                if port < 0 or port > 65535:
-                    raise ValueError()
-            except ValueError as err:
-                raise_from(ValueError('Port must be an integer between 0 and 65535:', port), err)
+        host_and_port = _split_host_and_port(entity)
+        if not host_and_port:
+            raise ValueError(_INVALID_HOST_MESSAGE)
+        host, port_str = host_and_port
+
+        if port_str:
+            port = _parse_port(port_str)
 
         nodelist.append((host, port))
 
     return nodelist
 
 
+_INVALID_HOST_MESSAGE = (
+    "Reserved characters such as ':' must be escaped according RFC "
+    "2396. An IPv6 address literal must be enclosed in '[' and ']' "
+    'according to RFC 2732.')
+
+
+def _split_host_and_port(entity):
+    """Split a "host[:port]" entity in its host and port parts.
+
+    An IPv6 address must be enclosed in brackets, which are removed from the
+    returned host. The port is None if not specified. Returns None if the entity
+    is not valid.
+    """
+    if entity.count(':') <= 1:
+        host, colon, port = entity.partition(':')
+        if host and (port or not colon):
+            if host.startswith('[') and host.endswith(']'):
+                host = host[1:-1]
+            return host, port or None
+
+    if entity.startswith('['):
+        closing_bracket = entity.find(']')
+        if closing_bracket > 1:
+            host = entity[1:closing_bracket]
+            port = entity[closing_bracket + 1:]
+            if not port:
+                return host, None
+            if port[0] == ':' and len(port) > 1 and ':' not in port[1:]:
+                return host, port[1:]
+
+    return None
+
+
+def _parse_port(port):
+    try:
+        port = int(port)
+        if port < 0 or port > 65535:
+            raise ValueError()
+    except ValueError as err:
+        raise_from(ValueError('Port must be an integer between 0 and 65535:', port), err)
+    return port
+
+
 _LAST_TIMESTAMP_INC = []
 
 
@@ -319,15 +362,23 @@ def patch_datetime_awareness_in_document(value):
     # mixing tz aware and naive.
     # On top of that, MongoDB date precision is up to millisecond, where Python
     # datetime use microsecond, so we must lower the precision to mimic mongo.
-    for best_type in (OrderedDict, dict):
-        if isinstance(value, best_type):
-            return best_type((k, patch_datetime_awareness_in_document(v)) for k, v in value.items())
+    if isinstance(value, dict):
+        # OrderedDict is kept as its equality, used to match sub-documents,
+        # depends on the order of the fields.
+        if isinstance(value, OrderedDict):
+            return OrderedDict(
+                (k, patch_datetime_awareness_in_document(v)) for k, v in value.items())
+        return {k: patch_datetime_awareness_in_document(v) for k, v in value.items()}
     if isinstance(value, (tuple, list)):
         return [patch_datetime_awareness_in_document(item) for item in value]
     if isinstance(value, datetime):
-        mongo_us = (value.microsecond // 1000) * 1000
+        microsecond = value.microsecond
+        mongo_us = microsecond - microsecond % 1000
         if value.tzinfo:
             return (value - value.utcoffset()).replace(tzinfo=None, microsecond=mongo_us)
+        if microsecond == mongo_us:
+            # Already at MongoDB precision, e.g. a datetime read from mongomock.
+            return value
         return value.replace(microsecond=mongo_us)
     if Timestamp and isinstance(value, Timestamp) and not value.time and not value.inc:
         return get_current_timestamp()
@@ -347,10 +398,45 @@ def make_datetime_timezone_aware_in_document(value):
     return value
 
 
+# Dotted keys are split over and over again when a query or a projection
+# is applied to many documents, so the results are cached.
+_DOT_CACHE_MAX_SIZE = 4096
+_SPLIT_DOT_CACHE = {}
+_RSPLIT_DOT_CACHE = {}
+
+
+def _split_dot(key):
+    try:
+        return _SPLIT_DOT_CACHE[key]
+    except KeyError:
+        if len(_SPLIT_DOT_CACHE) >= _DOT_CACHE_MAX_SIZE:
+            _SPLIT_DOT_CACHE.clear()
+        key_items = _SPLIT_DOT_CACHE[key] = tuple(key.split('.'))
+        return key_items
+
+
+def _rsplit_dot(key):
+    """Split a dotted key into its parent key and its last item.
+
+    The parent key is None if the key has no dot.
+    """
+    try:
+        return _RSPLIT_DOT_CACHE[key]
+    except KeyError:
+        if len(_RSPLIT_DOT_CACHE) >= _DOT_CACHE_MAX_SIZE:
+            _RSPLIT_DOT_CACHE.clear()
+        parent_key, dot, child_key = key.rpartition('.')
+        split = _RSPLIT_DOT_CACHE[key] = (parent_key, child_key) if dot else (None, key)
+        return split
+
+
 def get_value_by_dot(doc, key, can_generate_array=False):
     """Get dictionary value using dotted key"""
+    if '.' not in key and isinstance(doc, dict):
+        return doc[key]
+
     result = doc
-    key_items = key.split('.')
+    key_items = _split_dot(key)
     for key_index, key_item in enumerate(key_items):
         if isinstance(result, dict):
             result = result[key_item]
@@ -377,12 +463,15 @@ def get_value_by_dot(doc, key, can_generate_array=False):
 
 def set_value_by_dot(doc, key, value):
     """Set dictionary value using dotted key"""
-    try:
-        parent_key, child_key = key.rsplit('.', 1)
-        parent = get_value_by_dot(doc, parent_key)
-    except ValueError:
-        child_key = key
+    if '.' not in key and isinstance(doc, dict):
+        doc[key] = value
+        return doc
+
+    parent_key, child_key = _rsplit_dot(key)
+    if parent_key is None:
         parent = doc
+    else:
+        parent = get_value_by_dot(doc, parent_key)
 
     if isinstance(parent, dict):
         parent[child_key] = value
@@ -402,12 +491,15 @@ def delete_value_by_dot(doc, key):
 
     This function assumes that the value exists.
     """
-    try:
-        parent_key, child_key = key.rsplit('.', 1)
-        parent = get_value_by_dot(doc, parent_key)
-    except ValueError:
-        child_key = key
+    if '.' not in key:
+        del doc[key]
+        return doc
+
+    parent_key, child_key = _rsplit_dot(key)
+    if parent_key is None:
         parent = doc
+    else:
+        parent = get_value_by_dot(doc, parent_key)
 
     del parent[child_key]
 
@@ -1,11 +1,27 @@
-import collections
 import datetime
 import mongomock  # Used for utcnow - please see https://github.com/mongomock/mongomock#utcnow
+from mongomock.helpers import ORDERED_DICT_TYPE
+import os
 import six
-import six.moves
 import threading
 
-lock = threading.RLock()
+
+class _NoLock(object):
+    """Lock-like object that does nothing, for single-threaded usage."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+# Setting MONGOMOCK_THREAD_SAFE=0 avoids the cost of locking when mongomock is
+# only used from a single thread.
+if os.environ.get('MONGOMOCK_THREAD_SAFE', '1') == '0':
+    lock = _NoLock()
+else:
+    lock = threading.RLock()
 
 
 class ServerStore(object):
@@ -66,11 +82,16 @@ class CollectionStore(object):
     """Object holding the data for a collection."""
 
     def __init__(self, name):
-        self._documents = collections.OrderedDict()
+        self._documents = ORDERED_DICT_TYPE()
         self.indexes = {}
         self._is_force_created = False
         self.name = name
         self._ttl_indexes = {}
+        # Sweeping documents for TTL expiry is only needed when documents have
+        # been added or updated since the last sweep, or when the earliest
+        # expiry date found during the last sweep has been reached.
+        self._ttl_dirty = False
+        self._ttl_next_expiry = None
 
     def create(self):
         self._is_force_created = True
@@ -80,18 +101,22 @@ class CollectionStore(object):
         return self._documents or self.indexes or self._is_force_created
 
     def drop(self):
-        self._documents = collections.OrderedDict()
+        self._documents = ORDERED_DICT_TYPE()
         self.indexes = {}
         self._ttl_indexes = {}
+        self._ttl_dirty = False
+        self._ttl_next_expiry = None
         self._is_force_created = False
 
     def create_index(self, index_name, index_dict):
         self.indexes[index_name] = index_dict
         if index_dict.get('expireAfterSeconds') is not None:
             self._ttl_indexes[index_name] = index_dict
+            self._ttl_dirty = True
 
     def drop_index(self, index_name):
-        self._remove_expired_documents()
+        if self._ttl_indexes:
+            self._remove_expired_documents()
 
         # The main index object should raise a KeyError, but the
         # TTL indexes have no meaning to the outside.
@@ -100,81 +125,139 @@ class CollectionStore(object):
 
     @property
     def is_empty(self):
-        self._remove_expired_documents()
+        if self._ttl_indexes:
+            self._remove_expired_documents()
         return not self._documents
 
     def __contains__(self, key):
-        self._remove_expired_documents()
+        if self._ttl_indexes:
+            self._remove_expired_documents()
         return key in self._documents
 
     def __getitem__(self, key):
-        self._remove_expired_documents()
+        if self._ttl_indexes:
+            self._remove_expired_documents()
         return self._documents[key]
 
     def __setitem__(self, key, val):
         with lock:
             self._documents[key] = val
+            self._ttl_dirty = True
+
+    def mark_as_updated(self):
+        """Signal that some documents have been modified in place."""
+        self._ttl_dirty = True
 
     def __delitem__(self, key):
         del self._documents[key]
 
     def __len__(self):
-        self._remove_expired_documents()
+        if self._ttl_indexes:
+            self._remove_expired_documents()
         return len(self._documents)
 
     @property
     def documents(self):
-        self._remove_expired_documents()
-        for doc in six.itervalues(self._documents):
-            yield doc
+        if self._ttl_indexes:
+            self._remove_expired_documents()
+        # Return an iterator over a snapshot taken right away, so that the lock is
+        # held only while copying and documents can be inserted while the caller
+        # goes over the results.
+        with lock:
+            return iter(tuple(six.itervalues(self._documents)))
 
     def _remove_expired_documents(self):
+        # Callers check that there are TTL indexes first: this is called on every
+        # access to the documents and most collections have no TTL index.
+        if not self._ttl_dirty and not self._is_ttl_next_expiry_reached():
+            return
+
+        ttl_now = mongomock.utcnow()
+        next_expiry = None
         for index in six.itervalues(self._ttl_indexes):
-            self._expire_documents(index)
+            index_next_expiry = self._expire_documents(index, ttl_now)
+            if index_next_expiry is not None and \
+                    (next_expiry is None or index_next_expiry < next_expiry):
+                next_expiry = index_next_expiry
+        self._ttl_next_expiry = next_expiry
+        self._ttl_dirty = False
+
+    def _is_ttl_next_expiry_reached(self):
+        if self._ttl_next_expiry is None:
+            return False
+        try:
+            return mongomock.utcnow() >= self._ttl_next_expiry
+        except TypeError:
+            # mongomock.utcnow was patched to return something that is not a
+            # datetime: always sweep, the expiry checks will deal with it.
+            return True
 
-    def _expire_documents(self, index):
-        # TODO(juannyg): use a caching mechanism to avoid re-expiring the documents if
-        # we just did and no document was added / updated
+    def _expire_documents(self, index, ttl_now):
+        """Remove the documents expired according to the given TTL index.
 
+        Returns the date at which the next remaining document expires, or None.
+        """
         # Ignore non-integer values
         try:
             expiry = int(index['expireAfterSeconds'])
         except ValueError:
-            return
+            return None
 
         # Ignore commpound keys
         if len(index['key']) > 1:
-            return
+            return None
+
+        # Documents expire if their date is older than this threshold: computing it
+        # once avoids a timedelta per document.
+        try:
+            expiry_delta = datetime.timedelta(seconds=expiry)
+            expiry_threshold = ttl_now - expiry_delta
+        except OverflowError:
+            return None
 
         # "key" structure = list of (field name, direction) tuples
         ttl_field_name = index['key'][0][0]
-        ttl_now = mongomock.utcnow()
-        expired_ids = [
-            doc['_id'] for doc in six.itervalues(self._documents)
-            if self._value_meets_expiry(doc.get(ttl_field_name), expiry, ttl_now)
-        ]
-
-        for exp_id in expired_ids:
-            del self[exp_id]
-
-    def _value_meets_expiry(self, val, expiry, ttl_now):
-        val_to_compare = _get_min_datetime_from_value(val)
+        expired_ids = set()
+        next_expiry = None
+        for doc_id, doc in six.iteritems(self._documents):
+            val_to_compare = _get_min_datetime_from_value(doc.get(ttl_field_name))
+            if self._value_meets_expiry(val_to_compare, expiry_threshold):
+                expired_ids.add(doc_id)
+                continue
+            expiry_date = _get_expiry_date(val_to_compare, expiry_delta)
+            if expiry_date is not None and (next_expiry is None or expiry_date < next_expiry):
+                next_expiry = expiry_date
+
+        if expired_ids:
+            with lock:
+                if len(expired_ids) > len(self._documents) // 2:
+                    self._documents = ORDERED_DICT_TYPE(
+                        (doc_id, doc) for doc_id, doc in six.iteritems(self._documents)
+                        if doc_id not in expired_ids)
+                else:
+                    for exp_id in expired_ids:
+                        del self._documents[exp_id]
+
+        return next_expiry
+
+    def _value_meets_expiry(self, val_to_compare, expiry_threshold):
         try:
-            return (ttl_now - val_to_compare).total_seconds() >= expiry
+            return val_to_compare <= expiry_threshold
         except TypeError:
             return False
 
 
+def _get_expiry_date(val, expiry_delta):
+    try:
+        return val + expiry_delta
+    except (TypeError, OverflowError):
+        return None
+
+
 def _get_min_datetime_from_value(val):
     if not val:
         return datetime.datetime.max
     if isinstance(val, list):
-        return six.moves.reduce(_min_dt, [datetime.datetime.max] + val)
+        datetimes = [item for item in val if isinstance(item, datetime.datetime)]
+        return min(datetimes) if datetimes else datetime.datetime.max
     return val
-
-
-def _min_dt(dt1, dt2):
-    try:
-        return dt1 if dt1 < dt2 else dt2
-    except TypeError:
-        return dt1
@@ -4,17 +4,17 @@ from platform import python_version
 import re
 import uuid
 
-from six import integer_types, string_types, text_type
+from six import integer_types, iteritems, string_types, text_type
 
 try:
-    from bson import decimal128, Regex
+    from bson import decimal128, DBRef, Int64, ObjectId, Regex, SON
     _HAVE_PYMONGO = True
 except ImportError:
     _HAVE_PYMONGO = False
 
 
 class _NO_VALUE(object):
-    pass
+    __slots__ = ()
 
 
 # we don't use NOTHING because it might be returned from various APIs
@@ -28,6 +28,16 @@ if _HAVE_PYMONGO:
 else:
     _SUPPORTED_TYPES = _SUPPORTED_BASE_TYPES
 
+# Types of leaves whose native equality matches what diff reports.
+_PLAIN_SCALAR_TYPES = frozenset((bool, float, bytes, text_type) + string_types + integer_types)
+
+# Sequences at least this long are first compared natively when they only hold
+# plain scalars.
+_BULK_COMPARE_MIN_LENGTH = 32
+
+# An empty tuple of classes never matches, so no need to check _HAVE_PYMONGO.
+_REGEX_CLS = (Regex,) if _HAVE_PYMONGO else ()
+
 if python_version() < '3.0':
     dict_type = dict
 else:
@@ -35,74 +45,160 @@ else:
     dict_type = abc.Mapping
 
 
-def diff(a, b, path=None):
-    path = _make_path(path)
-    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
-        return _diff_sequences(a, b, path)
-    if type(a).__name__ == 'SON':
-        a = dict(a)
-    if type(b).__name__ == 'SON':
-        b = dict(b)
-    if type(a).__name__ == 'DBRef':
-        a = a.as_doc()
-    if type(b).__name__ == 'DBRef':
-        b = b.as_doc()
-    if isinstance(a, dict_type) and isinstance(b, dict_type):
-        return _diff_dicts(a, b, path)
-    if type(a).__name__ == 'ObjectId':
-        a = str(a)
-    if type(b).__name__ == 'ObjectId':
-        b = str(b)
-    if type(a).__name__ == 'Int64':
-        a = int(a)
-    if type(b).__name__ == 'Int64':
-        b = int(b)
-    if _HAVE_PYMONGO and isinstance(a, Regex):
-        a = a.try_compile()
-    if _HAVE_PYMONGO and isinstance(b, Regex):
-        b = b.try_compile()
-    if isinstance(a, (list, tuple)) or isinstance(b, (list, tuple)) or \
-            isinstance(a, dict_type) or isinstance(b, dict_type):
-        return [(path[:], a, b)]
-    if not isinstance(a, _SUPPORTED_TYPES):
-        raise NotImplementedError(
-            'Unsupported diff type: {0}'.format(type(a)))  # pragma: no cover
-    if not isinstance(b, _SUPPORTED_TYPES):
-        raise NotImplementedError(
-            'Unsupported diff type: {0}'.format(type(b)))  # pragma: no cover
-    if a != b:
-        return [(path[:], a, b)]
-    return []
-
-
-def _diff_dicts(a, b, path):
-    if not isinstance(a, type(b)):
-        return [(path[:], type(a), type(b))]
+def diff(a, b, path=None, full_payload=False):
+    # Most diffs are between equal documents: let the native comparison, which
+    # runs in C, confirm it before walking them.
+    if type(a) is type(b):
+        try:
+            if a == b:
+                return []
+        except Exception:
+            pass
     returned = []
-    for key in set(a) | set(b):
-        a_value = a.get(key, NO_VALUE)
-        b_value = b.get(key, NO_VALUE)
-        path.append(key)
-        if a_value is NO_VALUE or b_value is NO_VALUE:
-            returned.append((path[:], a_value, b_value))
-        else:
-            returned.extend(diff(a_value, b_value, path))
-        path.pop()
+    # Pairs of values left to compare, the next one last. Children are pushed
+    # in reverse order so that differences are reported in document order.
+    stack = [(a, b, _make_path(path))]
+    no_value = NO_VALUE
+    while stack:
+        a, b, path = stack.pop()
+        # Shared sub-documents (and interned leaves) need no traversal.
+        if a is b:
+            continue
+        if a is no_value or b is no_value:
+            returned.append((_materialize(path), a, b))
+            continue
+        # Fast paths for the most common containers, before the generic checks.
+        type_a = type(a)
+        type_b = type(b)
+        if type_a is dict and type_b is dict:
+            _diff_dicts(a, b, path, stack, returned)
+            continue
+        if type_a is list and type_b is list:
+            _diff_sequences(a, b, path, stack, returned, full_payload)
+            continue
+        if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            _diff_sequences(a, b, path, stack, returned, full_payload)
+            continue
+        a = _normalize(a)
+        b = _normalize(b)
+        if isinstance(a, dict_type) and isinstance(b, dict_type):
+            _diff_dicts(a, b, path, stack, returned)
+            continue
+        if isinstance(a, (list, tuple)) or isinstance(b, (list, tuple)) or \
+                isinstance(a, dict_type) or isinstance(b, dict_type):
+            returned.append((_materialize(path), a, b))
+            continue
+        # These checks are dropped when running with python -O.
+        if __debug__ and not isinstance(a, _SUPPORTED_TYPES):
+            raise NotImplementedError(
+                'Unsupported diff type: {0}'.format(type(a)))  # pragma: no cover
+        if __debug__ and not isinstance(b, _SUPPORTED_TYPES):
+            raise NotImplementedError(
+                'Unsupported diff type: {0}'.format(type(b)))  # pragma: no cover
+        if a != b:
+            returned.append((_materialize(path), a, b))
     return returned
 
 
-def _diff_sequences(a, b, path):
+def _identity(value):
+    return value
+
+
+def _dbref_as_doc(value):
+    return value.as_doc()
+
+
+def _try_compile_regex(value):
+    return value.try_compile()
+
+
+def _get_normalizer(value_type):
+    """Find how to convert values of a BSON type to comparable Python values."""
+    type_name = value_type.__name__
+    if type_name == 'SON':
+        return dict
+    if type_name == 'DBRef' and hasattr(value_type, 'as_doc'):
+        return _dbref_as_doc
+    if type_name == 'ObjectId':
+        return str
+    if type_name == 'Int64':
+        return int
+    if issubclass(value_type, _REGEX_CLS):
+        return _try_compile_regex
+    return _identity
+
+
+# Normalizer for each type met so far.
+_NORMALIZERS = {}
+if _HAVE_PYMONGO:
+    # Known BSON classes are matched by identity; other types (such as
+    # mongomock's own ObjectId) still go through the name-based lookup.
+    _NORMALIZERS.update({
+        SON: dict,
+        DBRef: _dbref_as_doc,
+        ObjectId: str,
+        Int64: int,
+        Regex: _try_compile_regex,
+    })
+
+
+def _normalize(value):
+    value_type = type(value)
+    try:
+        normalizer = _NORMALIZERS[value_type]
+    except KeyError:
+        normalizer = _NORMALIZERS[value_type] = _get_normalizer(value_type)
+    return normalizer(value)
+
+
+def _diff_dicts(a, b, path, stack, returned, _no_value=NO_VALUE):
+    if not isinstance(a, type(b)):
+        returned.append((_materialize(path), type(a), type(b)))
+        return
+    children = []
+    for key, a_value in iteritems(a):
+        children.append((a_value, b.get(key, _no_value), (path, key)))
+    for key in b:
+        if key not in a:
+            children.append((_no_value, b[key], (path, key)))
+    children.reverse()
+    stack.extend(children)
+
+
+def _diff_sequences(a, b, path, stack, returned, full_payload):
     if len(a) != len(b):
-        return [(path[:], a, b)]
-    returned = []
-    for i, a_i in enumerate(a):
-        path.append(i)
-        returned.extend(diff(a_i, b[i], path))
-        path.pop()
-    return returned
+        if full_payload:
+            returned.append((_materialize(path), a, b))
+        else:
+            returned.append((_materialize(path), ('len', len(a)), ('len', len(b))))
+        return
+    if len(a) >= _BULK_COMPARE_MIN_LENGTH and _are_plain_scalars(a) and \
+            _are_plain_scalars(b) and a == b:
+        return
+    for i in range(len(a) - 1, -1, -1):
+        stack.append((a[i], b[i], (path, i)))
+
+
+def _are_plain_scalars(values):
+    return set(map(type, values)) <= _PLAIN_SCALAR_TYPES
+
 
+# Paths are built while going down the documents as linked (parent, key) pairs,
+# and only turned into tuples of keys when a difference is reported.
 
 def _make_path(path):
-    if path is None:
-        return []
-    return path
+    """Convert an initial list of keys to a linked path."""
+    linked_path = None
+    for key in path or ():
+        linked_path = (linked_path, key)
+    return linked_path
+
+
+def _materialize(path):
+    """Convert a linked path to the tuple of its keys."""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    keys.reverse()
+    return tuple(keys)
@@ -141,8 +141,8 @@ def _expand_cursor(cursor, sort, by=by_id):
 def _format_diff_message(a_name, b_name, diff_list):
     msg = 'Unexpected Diff:'
     for (path, a_value, b_value) in diff_list:
-        a_path = [a_name] + path
-        b_path = [b_name] + path
+        a_path = (a_name,) + path
+        b_path = (b_name,) + path
         msg += '\n\t{} != {} ({} != {})'.format(
             '.'.join(map(str, a_path)), '.'.join(
                 map(str, b_path)), a_value, b_value)
@@ -15,6 +15,7 @@ import uuid
 import warnings
 
 import mongomock
+from mongomock import helpers
 
 try:
     from unittest import mock
@@ -140,9 +141,9 @@ class CollectionAPITest(TestCase):
         qr = col.find({'_id': r})
         self.assertEqual(qr.count(), 1)
 
-        self.assertTrue(isinstance(col._store._documents, collections.OrderedDict))
+        self.assertTrue(isinstance(col._store._documents, helpers.ORDERED_DICT_TYPE))
         self.db.drop_collection(col)
-        self.assertTrue(isinstance(col._store._documents, collections.OrderedDict))
+        self.assertTrue(isinstance(col._store._documents, helpers.ORDERED_DICT_TYPE))
         qr = col.find({'_id': r})
         self.assertEqual(qr.count(), 0)
 
@@ -639,6 +640,15 @@ class CollectionAPITest(TestCase):
         doc.pop('_id')
         self.assertDictEqual(doc, update)
 
+    def test__find_ordered_subdocument(self):
+        self.db.collection.insert_one(
+            {'a': collections.OrderedDict([('x', 1), ('y', 2)])})
+
+        self.assertTrue(self.db.collection.find_one(
+            {'a': collections.OrderedDict([('x', 1), ('y', 2)])}))
+        self.assertIsNone(self.db.collection.find_one(
+            {'a': collections.OrderedDict([('y', 2), ('x', 1)])}))
+
     def test__find_in_empty_collection(self):
         self.db.collection.drop()
 
@@ -1441,6 +1451,41 @@ class CollectionAPITest(TestCase):
             mongomock_utcnow.return_value = now + timedelta(100)
             self.assertEqual(self.db.collection.find({}).count(), 0)
 
+    @skipIf(not _HAVE_MOCK, 'mock not installed')
+    def test__ttl_expiry_of_several_documents_with_mock(self):
+        now = datetime.utcnow()
+        self.db.collection.create_index([('value', 1)], expireAfterSeconds=100)
+        self.db.collection.insert_many([
+            {'value': now + timedelta(seconds=100)},
+            {'value': now + timedelta(seconds=200)},
+            {'value': 'not a dt'},
+        ])
+        self.assertEqual(self.db.collection.find({}).count(), 3)
+
+        with mock.patch('mongomock.utcnow') as mongomock_utcnow:
+            mongomock_utcnow.return_value = now + timedelta(seconds=250)
+            self.assertEqual(self.db.collection.find({}).count(), 2)
+            mongomock_utcnow.return_value = now + timedelta(seconds=350)
+            self.assertEqual(self.db.collection.find({}).count(), 1)
+
+    def test__ttl_expiry_of_documents_with_dict_ids(self):
+        self.db.collection.create_index([('value', 1)], expireAfterSeconds=5)
+        self.db.collection.insert_many([
+            {'_id': {'a': 1}, 'value': datetime.utcnow() + timedelta(seconds=100)},
+            {'_id': {'a': 2}, 'value': datetime.utcnow() - timedelta(seconds=5)},
+            {'_id': {'a': 3}, 'value': datetime.utcnow() - timedelta(seconds=5)},
+        ])
+        self.assertEqual([{'a': 1}], [doc['_id'] for doc in self.db.collection.find()])
+
+    def test__ttl_expiry_after_update(self):
+        self.db.collection.create_index([('value', 1)], expireAfterSeconds=5)
+        self.db.collection.insert_one({'_id': 1, 'value': datetime.utcnow()})
+        self.assertEqual(self.db.collection.find({}).count(), 1)
+
+        self.db.collection.update_one(
+            {'_id': 1}, {'$set': {'value': datetime.utcnow() - timedelta(seconds=5)}})
+        self.assertEqual(self.db.collection.find({}).count(), 0)
+
     def test__ttl_index_is_removed_if_collection_dropped(self):
         self.db.collection.create_index([('value', 1)], expireAfterSeconds=0)
         self.db.collection.insert_one({'value': datetime.utcnow()})
@@ -2109,6 +2154,33 @@ class CollectionAPITest(TestCase):
     def test__codec_options_without_pymongo(self):
         self.assertEqual(self.db.collection.codec_options, self.db.codec_options)
 
+    def test__codec_options_namedtuple_api(self):
+        codec_opts = self.db.collection.codec_options
+        self.assertIsInstance(codec_opts, tuple)
+        self.assertFalse(hasattr(codec_opts, '__dict__'))
+        self.assertEqual('document_class', codec_opts._fields[0])
+        self.assertEqual(
+            codec_opts.with_options(tz_aware=True), codec_opts._replace(tz_aware=True))
+
+    def test__codec_options_with_options(self):
+        codec_opts = self.db.collection.codec_options
+        tz_aware_opts = codec_opts.with_options(tz_aware=True)
+        self.assertTrue(tz_aware_opts.tz_aware)
+        self.assertFalse(codec_opts.tz_aware)
+        self.assertIs(tz_aware_opts, codec_opts.with_options(tz_aware=True))
+        self.assertEqual(codec_opts, tz_aware_opts.with_options(tz_aware=False))
+
+        # Equal values of different types do not share a cached result.
+        self.assertIsInstance(
+            codec_opts.with_options(uuid_representation=3.0).uuid_representation, float)
+        self.assertIsInstance(
+            codec_opts.with_options(uuid_representation=3).uuid_representation, int)
+
+        # Invalid options are not cached.
+        for unused_attempt in range(2):
+            with self.assertRaises(TypeError):
+                codec_opts.with_options(tz_aware='yes')
+
     def test__with_options_wrong_kwarg(self):
         self.assertRaises(TypeError, self.db.collection.with_options, red_preference=None)
 
@@ -16,17 +16,30 @@ class DiffTest(TestCase):
         self._assert_entire_diff('a', 'b')
 
     def test__diff_sequences(self):
-        self._assert_entire_diff([], [1, 2, 3])
+        self._assert_entire_diff([], [1, 2, 3], full_payload=True)
+
+    def test__diff_sequences_lengths(self):
+        [(path, x, y)] = diff({'a': [1]}, {'a': [1, 2, 3]})
+        self.assertEqual(path, ('a',))
+        self.assertEqual(x, ('len', 1))
+        self.assertEqual(y, ('len', 3))
+
+    def test__diff_long_scalar_sequences(self):
+        a = list(range(100))
+        self.assertEqual(diff(a, list(a)), [])
+        b = list(a)
+        b[42] = 'x'
+        self.assertEqual(diff(a, b), [((42,), 42, 'x')])
 
     def test__composite_diff(self):
         a = {'a': {'b': [1, 2, 3]}}
         b = {'a': {'b': [1, 6, 3]}}
         [(path, x, y)] = diff(a, b)
-        self.assertEqual(path, ['a', 'b', 1])
+        self.assertEqual(path, ('a', 'b', 1))
         self.assertEqual(x, 2)
         self.assertEqual(y, 6)
 
-    def _assert_entire_diff(self, a, b):
-        [(_, x, y)] = diff(a, b)
+    def _assert_entire_diff(self, a, b, **kwargs):
+        [(_, x, y)] = diff(a, b, **kwargs)
         self.assertEqual(x, a)
         self.assertEqual(y, b)
@@ -1,9 +1,11 @@
+import collections
+from datetime import datetime, timedelta, tzinfo
 import json
 import os
 
 from mongomock.helpers import hashdict
 from mongomock.helpers import get_value_by_dot, set_value_by_dot
-from mongomock.helpers import parse_uri
+from mongomock.helpers import parse_uri, patch_datetime_awareness_in_document, utc
 from mongomock.helpers import print_deprecation_warning
 from unittest import TestCase
 
@@ -46,6 +48,14 @@ class HashdictTest(TestCase):
 
         self.assertEqual('hashdict(a=1, b=2)', repr(hashdict({'a': 1, 'b': 2})))
 
+    def test__hashdict_cached_hash(self):
+        _id = hashdict({'a': 1, 'b': {'c': [1, 2]}})
+        self.assertEqual(hash(_id), hash(_id))
+        self.assertEqual(hash(_id), hash(hashdict({'b': {'c': [1, 2]}, 'a': 1})))
+        added = _id + {'b': 2}
+        self.assertEqual('hashdict(a=1, b=2)', repr(added))
+        self.assertEqual(hash(added), hash(hashdict({'a': 1, 'b': 2})))
+
 
 class TestDeprecationWarning(TestCase):
     def test__deprecation_warning(self):
@@ -162,3 +172,39 @@ class ValueByDotTest(TestCase):
                 ({'a': [{'b': 1}]}, 'a.1.b'),
                 ({'a': [{'b': 1}]}, 'a.1')):
             self.assertRaises(KeyError, set_value_by_dot, doc, key, 42)
+
+
+class _UTCPlus2(tzinfo):
+
+    def tzname(self, dt):
+        return '<dummy UTC+2>'
+
+    def utcoffset(self, dt):
+        return timedelta(hours=2)
+
+    def dst(self, dt):
+        return timedelta(0)
+
+
+class PatchDatetimeAwarenessTest(TestCase):
+
+    def test__patch_datetime_awareness_in_document(self):
+        doc = collections.OrderedDict([
+            ('b', (datetime(2020, 1, 1, 12, 0, 0, 123456), 1)),
+            ('a', {'c': datetime(2020, 1, 1, 12, 0, 0, 1000, tzinfo=utc)}),
+        ])
+        patched = patch_datetime_awareness_in_document(doc)
+        self.assertEqual({
+            'b': [datetime(2020, 1, 1, 12, 0, 0, 123000), 1],
+            'a': {'c': datetime(2020, 1, 1, 12, 0, 0, 1000)},
+        }, patched)
+        self.assertEqual(['b', 'a'], list(patched))
+        self.assertIsInstance(patched['b'], list)
+        self.assertIsNone(patched['a']['c'].tzinfo)
+        self.assertIs(collections.OrderedDict, type(patched))
+        self.assertIs(dict, type(patched['a']))
+
+    def test__patch_datetime_awareness_converts_to_utc(self):
+        patched = patch_datetime_awareness_in_document(
+            datetime(2020, 1, 1, 12, tzinfo=_UTCPlus2()))
+        self.assertEqual(datetime(2020, 1, 1, 10), patched)